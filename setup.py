@@ -23,19 +23,15 @@
 
 #pylint: disable-msg=no-self-use
 
-from codecs import open as codec_open
-from os import close, unlink
-from os.path import abspath, dirname, join as joinpath
-from py_compile import compile as pycompile, PyCompileError
-from re import split as resplit, search as research
-from sys import stderr
-from tempfile import mkstemp
-from setuptools import find_packages, setup
+from os.path import abspath, dirname, join as joinpath, relpath
+from pathlib import Path
+from sys import flags, stderr
+from setuptools import setup
 from setuptools.command.build_py import build_py
 
 
 NAME = 'pyspiflash'
-PACKAGES = find_packages(where='.')
+PACKAGES = ['spiflash']
 META_PATH = joinpath('spiflash', '__init__.py')
 KEYWORDS = ['driver', 'ftdi', 'usb', 'spi', 'flash', 'mtd']
 CLASSIFIERS = [
@@ -58,7 +54,7 @@ INSTALL_REQUIRES = [
     'pyftdi >= 0.42, < 0.60'
 ]
 
-HERE = abspath(dirname(__file__))
+HERE = Path(abspath(dirname(__file__)))
 
 
 def read(*parts):
@@ -66,24 +62,42 @@ def read(*parts):
     Build an absolute path from *parts* and and return the contents of the
     resulting file.  Assume UTF-8 encoding.
     """
-    with codec_open(joinpath(HERE, *parts), 'rb', 'utf-8') as dfp:
-        return dfp.read()
+    return HERE.joinpath(*parts).read_text(encoding='utf-8')
+
+
+def parse_meta(text):
+    """
+    Extract all __*meta*__ string assignments from *text*.
+    """
+    meta = {}
+    for line in text.splitlines():
+        if not line.startswith('__'):
+            continue
+        name, sep, value = line.partition('=')
+        value = value.lstrip()
+        if not sep or not value or value[0] not in '\'"':
+            continue
+        # only consider the first quoted string, ignore what follows it
+        end = value.find(value[0], 1)
+        if end < 0:
+            continue
+        meta[name.strip().strip('_')] = value[1:end]
+    return meta
 
 
 META_FILE = read(META_PATH)
+META = parse_meta(META_FILE)
 
 
 def find_meta(meta):
     """
     Extract __*meta*__ from META_FILE.
     """
-    meta_match = research(
-        r"(?m)^__{meta}__ = ['\"]([^'\"]*)['\"]".format(meta=meta),
-        META_FILE
-    )
-    if meta_match:
-        return meta_match.group(1)
-    raise RuntimeError("Unable to find __{meta}__ string.".format(meta=meta))
+    try:
+        return META[meta]
+    except KeyError:
+        raise RuntimeError("Unable to find __{meta}__ string.".format(
+            meta=meta)) from None
 
 
 class BuildPy(build_py):
@@ -104,30 +118,62 @@ class BuildPy(build_py):
        setuptools perspective...
     """
 
+    MAX_LINE_WIDTH = 79
+
     def byte_compile(self, files):
-        for file in files:
-            if not file.endswith('.py'):
-                continue
-            pfd, pyc = mkstemp('.pyc')
-            close(pfd)
-            try:
-                pycompile(file, pyc, doraise=True)
-                self._check_line_width(file)
-                continue
-            except PyCompileError as exc:
-                # avoid chaining exceptions
-                print(str(exc), file=stderr)
-                raise SyntaxError("Cannot byte-compile '%s'" % file)
-            finally:
-                unlink(pyc)
-        super().byte_compile(files)
+        # only import the compilation modules when a build is requested,
+        # metadata-only invocations of setup.py do not need them
+        from concurrent.futures import ThreadPoolExecutor
+        from importlib.util import cache_from_source
+        from os import cpu_count
+        from tempfile import TemporaryDirectory
+        # as with distutils, bytecode is not written when the interpreter is
+        # told not to (python -B), still check the syntax of each file
+        levels = []
+        if not (flags.dont_write_bytecode or self.dry_run):
+            if self.compile:
+                levels.append(0)
+            if self.optimize > 0:
+                levels.append(self.optimize)
+        py_files = [file for file in files if file.endswith('.py')]
+        with TemporaryDirectory() as tmpdir:
+            jobs = []
+            for pos, file in enumerate(py_files):
+                if levels:
+                    # emit the bytecode where distutils expects it, the first
+                    # compilation also acts as the syntax check
+                    targets = [(cache_from_source(file,
+                                                  optimization=level or ''),
+                                level) for level in levels]
+                else:
+                    targets = [(joinpath(tmpdir, '%d.pyc' % pos), 0)]
+                jobs.append((file, relpath(file, self.build_lib), targets))
+            # files are independent from each other, compile them
+            # concurrently; the first error, if any, is re-raised here
+            with ThreadPoolExecutor(max_workers=cpu_count() or 1) as executor:
+                list(executor.map(lambda job: self._check_source(*job),
+                                  jobs))
+
+    def _check_source(self, file, dfile, targets):
+        from py_compile import compile as pycompile, PyCompileError
+        try:
+            for pyc, level in targets:
+                pycompile(file, pyc, dfile, doraise=True, optimize=level)
+        except PyCompileError as exc:
+            # avoid chaining exceptions
+            print(str(exc), file=stderr)
+            raise SyntaxError("Cannot byte-compile '%s'" % file)
+        self._check_line_width(file)
 
     def _check_line_width(self, file):
         with open(file, 'rt') as pfp:
-            for lpos, line in enumerate(pfp, start=1):
-                if len(line) > 80:
-                    print('\n  %d: %s' % (lpos, line.rstrip()))
-                    raise RuntimeError("Invalid line width '%s'" % file)
+            lines = pfp.read().splitlines()
+        if max(map(len, lines), default=0) <= self.MAX_LINE_WIDTH:
+            return
+        for lpos, line in enumerate(lines, start=1):
+            if len(line) > self.MAX_LINE_WIDTH:
+                print('\n  %d: %s' % (lpos, line.rstrip()))
+                raise RuntimeError("Invalid line width '%s'" % file)
 
 
 def main():
@@ -146,7 +192,6 @@ def main():
         long_description=read('README.rst'),
         packages=PACKAGES,
         package_dir={'': '.'},
-        package_data={'spiflash': ['*.rst']},
         classifiers=CLASSIFIERS,
         install_requires=INSTALL_REQUIRES,
         python_requires='>=3.5',
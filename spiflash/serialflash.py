@@ -19,10 +19,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import sys
 import time
 from binascii import hexlify
-from typing import Iterable, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
 from pyftdi.misc import pretty_size
 from pyftdi.spi import SpiController, SpiPort
 
@@ -206,6 +206,7 @@ class SerialFlashManager:
     """
 
     CMD_JEDEC_ID = 0x9F
+    REQ_JEDEC_ID = bytes((CMD_JEDEC_ID,))
 
     @staticmethod
     def get_from_controller(spictrl: SpiController,
@@ -254,23 +255,35 @@ class SerialFlashManager:
     @staticmethod
     def read_jedec_id(spi: SpiPort) -> bytes:
         """Read flash device JEDEC identifier (3 bytes)"""
-        jedec_cmd = bytes((SerialFlashManager.CMD_JEDEC_ID,))
-        return spi.exchange(jedec_cmd, 3)
+        return spi.exchange(SerialFlashManager.REQ_JEDEC_ID, 3)
 
     @staticmethod
     def _get_flash(spi: SpiPort, jedec: bytes) -> '_SpiFlashDevice':
-        devices = []
-        contents = sys.modules[__name__].__dict__
-        for name in contents:
-            if name.endswith('FlashDevice') and not name.startswith('_'):
-                devices.append(contents[name])
-        for device in devices:
-            if device.match(jedec):
-                return device(spi, jedec)
+        device = SerialFlashManager._get_flash_class(bytes(jedec[:3]))
+        if device:
+            return device(spi, jedec)
         if any(jedec):
             raise SerialFlashUnknownJedec(jedec)
         raise SerialFlashError('No serial flash detected')
 
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _get_flash_class(jedec: bytes) -> Optional[type]:
+        for device in _FLASH_DEVICES.get(jedec[0], ()):
+            if device.match(jedec):
+                return device
+        return None
+
+
+# supported flash device classes, indexed by JEDEC manufacturer identifier
+_FLASH_DEVICES = {}
+
+
+def _register_flash_device(cls):
+    """Class decorator to declare a flash device class to the manager."""
+    _FLASH_DEVICES.setdefault(cls.JEDEC_ID, []).append(cls)
+    return cls
+
 
 class _SpiFlashDevice(SerialFlash):
     """Generic flash device implementation.
@@ -287,9 +300,15 @@ class _SpiFlashDevice(SerialFlash):
     CMD_READ_LO_SPEED = 0x03  # Read @ low speed
     CMD_READ_HI_SPEED = 0x0B  # Read @ high speed
     ADDRESS_WIDTH = 3
+    POLL_SPIN_MAX = 0.005  # 5 ms, shorter operations are busy-polled
+    # erasable block kinds, from the largest to the smallest one
+    ERASE_BLOCKS = (('sector', SerialFlash.FEAT_SECTERASE),
+                    ('hsector', SerialFlash.FEAT_HSECTERASE),
+                    ('subsector', SerialFlash.FEAT_SUBSECTERASE))
 
     def __init__(self, spiport: SpiPort):
         self._spi = spiport
+        self._read_chunk = SpiController.PAYLOAD_MAX_LENGTH
 
     @property
     def spi_frequency(self) -> float:
@@ -299,16 +318,60 @@ class _SpiFlashDevice(SerialFlash):
         """
         return self._spi and self._spi.frequency
 
+    @property
+    def read_chunk_size(self) -> int:
+        """Return the maximum count of bytes requested in a single SPI
+           read transaction.
+
+           :return: the chunk size in bytes.
+        """
+        return self._read_chunk
+
+    @read_chunk_size.setter
+    def read_chunk_size(self, size: int) -> None:
+        """Change the maximum count of bytes requested in a single SPI read
+           transaction, to tune the read throughput of the USB adapter.
+
+           :param size: the chunk size in bytes
+        """
+        if not 0 < size <= SpiController.PAYLOAD_MAX_LENGTH:
+            raise SerialFlashValueError('Invalid read chunk size')
+        self._read_chunk = size
+
     def read(self, address: int, length: int) -> bytes:
         if address+length > len(self):
             raise SerialFlashValueError('Out of range')
-        buf = bytearray()
-        while length > 0:
-            size = min(length, SpiController.PAYLOAD_MAX_LENGTH)
-            data = self._read_hi_speed(address, size)
-            length -= len(data)
-            address += len(data)
-            buf.extend(data)
+        buf = bytearray(length)
+        view = memoryview(buf)
+        pos = 0
+        held = False
+        try:
+            while pos < length:
+                size = min(length-pos, self._read_chunk)
+                last = pos+size >= length
+                if pos:
+                    # /CS is kept asserted between chunks: the device keeps
+                    # on streaming out the next bytes, no need to resend a
+                    # command
+                    data = self._spi.read(size, start=False, stop=last)
+                else:
+                    data = self._read_hi_speed(address, size, last)
+                held = not last
+                if len(data) != size:
+                    raise SerialFlashError('Short read @ 0x%06x: %d/%d bytes'
+                                           % (address+pos, len(data), size))
+                view[pos:pos+size] = data
+                pos += size
+        except Exception:
+            if held:
+                # a streaming read is in progress, release /CS so that the
+                # device accepts new commands
+                try:
+                    self._spi.read(0, start=False, stop=True)
+                except Exception:  # pylint: disable-msg=broad-except
+                    # report the original error, not the cleanup one
+                    pass
+            raise
         return bytes(buf)
 
     def erase(self, address: int, length: int, verify: bool = False) -> None:
@@ -339,76 +402,10 @@ class _SpiFlashDevice(SerialFlash):
                                  self.get_timings('chip'))
                 return
         self.get_erase_size()
-        # first page to erase on the left-hand size
-        start = address
-        # last page to erase on the left-hand size
-        end = start + length
-        # first page to erase on the right-hand size
-        rstart = start
-        # last page to erase on the right-hand size
-        rend = end
-        if self.has_feature(SerialFlash.FEAT_SECTERASE):
-            # Check whether one or more whole large sector can be erased
-            sector_size = self.get_size('sector')
-            sector_mask = ~(sector_size-1)
-            s_start = (start+sector_size-1) & sector_mask
-            s_end = end & sector_mask
-            if s_start < s_end:
-                self._erase_blocks(self.get_erase_command('sector'),
-                                   self.get_timings('sector'),
-                                   s_start, s_end, sector_size)
-                # update the left-hand end marker
-                end = s_start
-                # update the right-hand start marker
-                if s_end > rstart:
-                    rstart = s_end
-        if self.has_feature(SerialFlash.FEAT_HSECTERASE):
-            # Check whether one or more left halfsectors can be erased
-            hsector_size = self.get_size('hsector')
-            hsector_mask = ~(hsector_size-1)
-            hsl_start = (start+sector_size-1) & sector_mask
-            hsl_end = end & sector_mask
-            if hsl_start < hsl_end:
-                self._erase_blocks(self.get_erase_command('hsector'),
-                                   self.get_timings('hsector'),
-                                   hsl_start, hsl_end, hsector_size)
-                # update the left-hand end marker
-                end = hsl_start
-                # update the right-hand start marker
-                if hsl_end > rstart:
-                    rstart = hsl_end
-        if self.has_feature(SerialFlash.FEAT_SUBSECTERASE):
-            # Check whether one or more left subsectors can be erased
-            subsector_size = self.get_size('subsector')
-            subsector_mask = ~(subsector_size-1)
-            ssl_start = (start+subsector_size-1) & subsector_mask
-            ssl_end = end & subsector_mask
-            if ssl_start < ssl_end:
-                self._erase_blocks(self.get_erase_command('subsector'),
-                                   self.get_timings('subsector'),
-                                   ssl_start, ssl_end, subsector_size)
-                # update the right-hand start marker
-                if ssl_end > rstart:
-                    rstart = ssl_end
-        if self.has_feature(SerialFlash.FEAT_HSECTERASE):
-            # Check whether one or more whole left halfsectors can be erased
-            hsr_start = (rstart+hsector_size-1) & hsector_mask
-            hsr_end = rend & hsector_mask
-            if hsr_start < hsr_end:
-                self._erase_blocks(self.get_erase_command('hsector'),
-                                   self.get_timings('hsector'),
-                                   hsr_start, hsr_end, hsector_size)
-                # update the right-hand start marker
-                if hsr_end > rstart:
-                    rstart = hsr_end
-        if self.has_feature(SerialFlash.FEAT_SUBSECTERASE):
-            # Check whether one or more whole right subsectors can be erased
-            ssr_start = (rstart+subsector_size-1) & subsector_mask
-            ssr_end = rend & subsector_mask
-            if ssr_start < ssr_end:
-                self._erase_blocks(self.get_erase_command('subsector'),
-                                   self.get_timings('subsector'),
-                                   ssr_start, ssr_end, subsector_size)
+        for kind, start, end in self._plan_erase(address, address+length):
+            self._erase_blocks(self.get_erase_command(kind),
+                               self.get_timings(kind),
+                               start, end, self.get_size(kind))
         if verify:
             self._verify_content(address, length, 0xFF)
 
@@ -452,34 +449,93 @@ class _SpiFlashDevice(SerialFlash):
         """Get the erase command for a specified block kind"""
         raise NotImplementedError()
 
+    def _plan_erase(self, address: int, end: int) \
+            -> List[Tuple[str, int, int]]:
+        """Split an area into the biggest erasable blocks.
+
+           Each supported block kind, from the largest to the smallest one,
+           is used to erase the aligned core of the areas that are left over
+           from the previous, larger block kind.
+
+           :param address: start address of the area to erase
+           :param end: end address (excluded) of the area to erase
+           :return: a sequence of (block kind, start, end) segments, sorted
+                    by address
+        """
+        plan = []
+        areas = [(address, end)]
+        for kind, feature in self.ERASE_BLOCKS:
+            if not self.has_feature(feature):
+                continue
+            size = self.get_size(kind)
+            mask = ~(size-1)
+            leftovers = []
+            for start, stop in areas:
+                bstart = (start+size-1) & mask
+                bend = stop & mask
+                if bstart < bend:
+                    plan.append((kind, bstart, bend))
+                    leftovers.append((start, bstart))
+                    leftovers.append((bend, stop))
+                else:
+                    leftovers.append((start, stop))
+            areas = [(start, stop) for start, stop in leftovers
+                     if start < stop]
+        plan.sort(key=lambda segment: segment[1])
+        return plan
+
     def _read_lo_speed(self, address: int, length: int) -> bytes:
-        read_cmd = bytes((self.CMD_READ_LO_SPEED,
-                          (address >> 16) & 0xff, (address >> 8) & 0xff,
-                          address & 0xff))
+        read_cmd = bytes((self.CMD_READ_LO_SPEED,)) + \
+            address.to_bytes(3, 'big')
         return self._spi.exchange(read_cmd, length)
 
-    def _read_hi_speed(self, address: int, length: int) -> bytes:
-        read_cmd = bytes((self.CMD_READ_HI_SPEED,
-                          (address >> 16) & 0xff, (address >> 8) & 0xff,
-                          address & 0xff, 0))
-        return self._spi.exchange(read_cmd, length)
+    def _read_hi_speed(self, address: int, length: int,
+                       stop: bool = True) -> bytes:
+        read_cmd = bytes((self.CMD_READ_HI_SPEED,)) + \
+            address.to_bytes(3, 'big') + b'\x00'
+        return self._spi.exchange(read_cmd, length, stop=stop)
 
     def _verify_content(self, address: int, length: int, refbyte: int) -> None:
-        data = self.read(address, length)
-        count = data.count(refbyte)
-        if count != length:
-            raise SerialFlashError('%d bytes are not erased' % (length-count))
+        # check the content one chunk at a time, so that a whole device is
+        # never held in memory and a failure is reported early
+        while length:
+            size = min(length, self._read_chunk)
+            data = self.read(address, size)
+            count = data.count(refbyte)
+            if count != size:
+                # locate the first mismatch, lstrip() scans at C speed
+                first = size-len(data.lstrip(bytes((refbyte,))))
+                raise SerialFlashError('%d bytes not erased in 0x%06x..'
+                                       '0x%06x, first @ 0x%06x' %
+                                       (size-count, address, address+size-1,
+                                        address+first))
+            address += size
+            length -= size
 
     def _wait_for_completion(self, times: Tuple[float, float]) -> None:
         typical_time, max_time = times
         timeout = time.time()
         timeout += typical_time+max_time
+        if typical_time > self.POLL_SPIN_MAX:
+            # actual devices often complete faster than their datasheet
+            # typical time: start polling early, with increasing delays
+            # capped to a fraction of the typical time, so that completion
+            # around the typical time is still detected early enough; the
+            # first delay is therefore never shorter than POLL_SPIN_MAX/8
+            delay = typical_time/8
+            time.sleep(delay)
+        else:
+            # short operations complete within the OS sleep granularity,
+            # poll without sleeping: the SPI request round-trip paces the loop
+            delay = 0
         cycle = 0
         while self.is_busy():
             # need to wait at least once
             if cycle and time.time() > timeout:
                 raise SerialFlashTimeout('Command timeout (%d cycles)' % cycle)
-            time.sleep(typical_time)
+            if delay:
+                delay = min(2*delay, typical_time/4)
+                time.sleep(delay)
             cycle += 1
 
     def _erase_blocks(self, command: int, times: Tuple[float, float],
@@ -541,9 +597,19 @@ class _Gen25FlashDevice(_SpiFlashDevice):
     CMD_ERASE_SECTOR = 0xD8
     CMD_ERASE_CHIP = 0xC7
 
+    # prebuilt requests for constant commands; they are built from the above
+    # values when the class is defined, a subclass which overrides one of
+    # the CMD_* or SR_* values they use should redefine the matching REQ_*
+    REQ_READ_STATUS = bytes((CMD_READ_STATUS,))
+    REQ_WRITE_ENABLE = bytes((CMD_WRITE_ENABLE,))
+    REQ_WRITE_DISABLE = bytes((CMD_WRITE_DISABLE,))
+    REQ_UNLOCK = bytes((CMD_WRSR,
+                        SR_WEL | SR_PROTECT_NONE | SR_UNLOCK_PROTECT))
+
     def __init__(self, spi: SpiPort):
         super(_Gen25FlashDevice, self).__init__(spi)
         self._size = 0
+        self._sizes = {}
 
     def __len__(self):
         return self._size
@@ -554,12 +620,15 @@ class _Gen25FlashDevice(_SpiFlashDevice):
         self._spi.set_frequency(freq)
 
     def get_size(self, kind):
-        try:
-            div = getattr(self, '%s_DIV' % kind.upper())
-            return 1 << div
-        except AttributeError:
-            raise SerialFlashNotSupported('%s size is not supported' %
-                                          kind.title())
+        size = self._sizes.get(kind)
+        if size is None:
+            try:
+                div = getattr(self, '%s_DIV' % kind.upper())
+            except AttributeError:
+                raise SerialFlashNotSupported('%s size is not supported' %
+                                              kind.title())
+            size = self._sizes[kind] = 1 << div
+        return size
 
     @classmethod
     def get_erase_command(cls, block: str) -> str:
@@ -599,11 +668,7 @@ class _Gen25FlashDevice(_SpiFlashDevice):
 
     def unlock(self) -> None:
         self._enable_write()
-        wrsr_cmd = bytes((_Gen25FlashDevice.CMD_WRSR,
-                          _Gen25FlashDevice.SR_WEL |
-                          _Gen25FlashDevice.SR_PROTECT_NONE |
-                          _Gen25FlashDevice.SR_UNLOCK_PROTECT))
-        self._spi.exchange(wrsr_cmd)
+        self._spi.exchange(self.REQ_UNLOCK)
         duration = self.get_timings('lock')
         if any(duration):
             self._wait_for_completion(duration)
@@ -617,62 +682,72 @@ class _Gen25FlashDevice(_SpiFlashDevice):
     def write(self, address: int,
               data: Union[bytes, bytearray, Iterable[int]]) -> None:
         """Write a sequence of bytes, starting at the specified address."""
-        length = len(data)
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+        view = memoryview(data).cast('B')
+        length = len(view)
         if address+length > len(self):
             raise SerialFlashValueError('Cannot fit in flash area')
-        if not isinstance(data, (bytes, bytearray)):
-            data = bytes(data)
         pos = 0
         page_size = self.get_size('page')
         while pos < length:
-            size = min(length-pos, page_size)
-            self._write(address, data[pos:pos+size])
+            # stop each chunk on a page boundary, so that an unaligned
+            # request does not need two program commands per page
+            size = min(length-pos, page_size-(address & (page_size-1)))
+            self._write(address, view[pos:pos+size])
             address += size
             pos += size
 
     def _read_status(self) -> int:
-        read_cmd = bytes((self.CMD_READ_STATUS,))
-        data = self._spi.exchange(read_cmd, 1)
+        data = self._spi.exchange(self.REQ_READ_STATUS, 1)
         if len(data) != 1:
             raise SerialFlashTimeout("Unable to retrieve flash status")
         return data[0]
 
     def _enable_write(self) -> None:
-        wren_cmd = bytes((self.CMD_WRITE_ENABLE,))
-        self._spi.exchange(wren_cmd)
+        self._spi.exchange(self.REQ_WRITE_ENABLE)
 
     def _disable_write(self) -> None:
-        wrdi_cmd = bytes((self.CMD_WRITE_DISABLE,))
-        self._spi.exchange(wrdi_cmd)
+        self._spi.exchange(self.REQ_WRITE_DISABLE)
 
-    def _write(self, address: int, data: bytes) -> None:
+    def _write(self, address: int, data: Union[bytes, memoryview]) -> None:
+        page_size = self.get_size('page')
+        offset = address & (page_size-1)
+        if offset+len(data) <= page_size:
+            # most common case, write() never crosses a page boundary
+            self._program_page(address, data)
+            return
         # take care not to roll over the end of the flash page
-        page_mask = self.get_size('page')-1
-        if address & page_mask:
-            up = (address+page_mask) & ~page_mask
-            count = min(len(data), up-address)
-            sequences = [(address, data[:count]), (up, data[count:])]
-        else:
-            sequences = [(address, data)]
-        for addr, chunk in sequences:
-            self._enable_write()
-            wcmd = bytearray((self.CMD_PROGRAM_PAGE,
-                              (addr >> 16) & 0xff, (addr >> 8) & 0xff,
-                              addr & 0xff))
-            wcmd.extend(chunk)
-            self._spi.exchange(wcmd)
-            self._wait_for_completion(self.get_timings('page'))
+        count = page_size-offset
+        self._program_page(address, data[:count])
+        self._program_page(address+count, data[count:])
+
+    def _program_page(self, address: int,
+                      data: Union[bytes, memoryview]) -> None:
+        """Program data which fit within a single flash page."""
+        self._enable_write()
+        wcmd = bytearray(4+len(data))
+        wcmd[0] = self.CMD_PROGRAM_PAGE
+        wcmd[1:4] = address.to_bytes(3, 'big')
+        wcmd[4:] = data
+        self._spi.exchange(wcmd)
+        self._wait_for_completion(self.get_timings('page'))
 
     def _erase_blocks(self, command: int, times: Tuple[float, float],
                       start: int, end: int, size: int) -> None:
         """Erase one or more blocks."""
-        while start < end:
+        cmd = bytearray((command, 0, 0, 0))
+        for address in range(start, end, size):
+            cmd[1:] = address.to_bytes(3, 'big')
             self._enable_write()
-            cmd = bytes((command, (start >> 16) & 0xff,
-                         (start >> 8) & 0xff, start & 0xff))
             self._spi.exchange(cmd)
             self._wait_for_completion(times)
-            start += size
+
+    def _erase_chip(self, command: int, times: Tuple[float, float]) -> None:
+        """Erase an entire chip."""
+        self._enable_write()
+        self._spi.exchange(bytes((command,)))
+        self._wait_for_completion(times)
 
     @classmethod
     def _is_busy(cls, status: int) -> bool:
@@ -683,6 +758,7 @@ class _Gen25FlashDevice(_SpiFlashDevice):
         return bool(status & cls.SR_WEL)
 
 
+@_register_flash_device
 class Sst25FlashDevice(_Gen25FlashDevice):
     """SST25 flash device implementation"""
 
@@ -691,12 +767,15 @@ class Sst25FlashDevice(_Gen25FlashDevice):
     CMD_PROGRAM_BYTE = 0x02
     CMD_PROGRAM_WORD = 0xAD  # Auto address increment (for write command)
     CMD_WRITE_STATUS_REGISTER = 0x01
+    REQ_UNPROTECT = bytes((CMD_WRITE_STATUS_REGISTER, 0x00))
     SST25_AAI = 0b01000000  # AAI mode activation flag
     SIZES = {0x41: 2 << 20, 0x4A: 4 << 20}
     SPI_FREQ_MAX = 66  # MHz
-    TIMINGS = {'subsector': (0.025, 0.025),  # 25 ms
+    TIMINGS = {'word': (0.00001, 0.05),  # 10 us/50 ms
+               'subsector': (0.025, 0.025),  # 25 ms
                'hsector': (0.025, 0.025),  # 25 ms
                'sector': (0.025, 0.025),  # 25 ms
+               'status': (0.0, 0.1),  # immediate/100 ms
                'lock': (0.0, 0.0)}  # immediate
     FEATURES = (SerialFlash.FEAT_SECTERASE |
                 SerialFlash.FEAT_SUBSECTERASE |
@@ -721,41 +800,40 @@ class Sst25FlashDevice(_Gen25FlashDevice):
            device offers lightning-speed flash erasure.
            Although the device supports byte-aligned write requests, the
            current implementation only support half-word write requests."""
-        if address+len(data) > len(self):
-            raise SerialFlashValueError('Cannot fit in flash area')
-        if not isinstance(data, (bytes, bytearray)):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             data = bytes(data)
+        data = memoryview(data).cast('B')
         length = len(data)
+        if address+length > len(self):
+            raise SerialFlashValueError('Cannot fit in flash area')
         if (address & 0x1) or (length & 0x1) or (length == 0):
             raise SerialFlashNotSupported("Alignement/size not supported")
         self._unprotect()
         self._enable_write()
-        aai_cmd = bytes((Sst25FlashDevice.CMD_PROGRAM_WORD,
-                         (address >> 16) & 0xff,
-                         (address >> 8) & 0xff,
-                         address & 0xff,
-                         data.pop(0), data.pop(0)))
-        offset = 0
-        while True:
-            offset += 2
-            self._spi.exchange(aai_cmd)
-            while self.is_busy():
-                time.sleep(0.01)  # 10 ms
-            if not data:
-                break
-            aai_cmd = bytes((Sst25FlashDevice.CMD_PROGRAM_WORD,
-                             data.pop(0), data.pop(0)))
+        aai_cmd = bytes((Sst25FlashDevice.CMD_PROGRAM_WORD,)) + \
+            address.to_bytes(3, 'big') + data[:2]
+        self._spi.exchange(aai_cmd)
+        times = self.get_timings('word')
+        self._wait_for_completion(times)
+        # the next words are sent w/o address, reuse the same command buffer
+        # as pyftdi copies it into its own transmit buffer
+        aai_cmd = bytearray((Sst25FlashDevice.CMD_PROGRAM_WORD, 0, 0))
+        exchange = self._spi.exchange
+        wait = self._wait_for_completion
+        for offset in range(2, length, 2):
+            aai_cmd[1:] = data[offset:offset+2]
+            exchange(aai_cmd)
+            wait(times)
         self._disable_write()
 
     def _unprotect(self):
         """Disable default protection for all sectors"""
-        unprotect = bytes((Sst25FlashDevice.CMD_WRITE_STATUS_REGISTER, 0x00))
         self._enable_write()
-        self._spi.exchange(unprotect)
-        while self.is_busy():
-            time.sleep(0.01)  # 10 ms
+        self._spi.exchange(self.REQ_UNPROTECT)
+        self._wait_for_completion(self.get_timings('status'))
 
 
+@_register_flash_device
 class S25FlFlashDevice(_Gen25FlashDevice):
     """Spansion S25FL flash device implementation"""
 
@@ -769,6 +847,7 @@ class S25FlFlashDevice(_Gen25FlashDevice):
     CR_LOCK = 0x10
     CR_TBPROT = 0x20
     CMD_READ_CONFIG = 0x35
+    REQ_READ_CONFIG = bytes((CMD_READ_CONFIG,))
     SPI_FREQ_MAX = 104  # MHz (P series only)
     TIMINGS = {'page': (0.0015, 0.003),  # 1.5/3 ms
                'subsector': (0.2, 0.8),  # 200/800 ms
@@ -785,58 +864,61 @@ class S25FlFlashDevice(_Gen25FlashDevice):
         device, capacity = jedec[1:3]
         self._device = self.DEVICES[device]
         self._size = S25FlFlashDevice.SIZES[capacity]
+        self._erase_layout = None
 
     def __str__(self):
         return 'Spansion %s %s' % \
             (self._device, pretty_size(self._size, lim_m=1 << 20))
 
     def can_erase(self, address: int, length: int):
-        # we first need to check the current configuration register, as a
-        # previous configuration may prevent from altering some of the bits
-        readcfg_cmd = bytes((S25FlFlashDevice.CMD_READ_CONFIG,))
-        config = self._spi.exchange(readcfg_cmd, 1)[0]
-        if config & S25FlFlashDevice.CR_TBPARM:
-            # "parameter zone" is defined in the high sectors
-            border = len(self)-2*self.get_size('sector')
-            ls_size = self.get_size('sector')
-            rs_size = self.get_size('subsector')
-        else:
-            # "parameter zone" is defined in the low sectors
-            border = 2*self.get_size('sector')
-            ls_size = self.get_size('subsector')
-            rs_size = self.get_size('sector')
+        border, ls_size, rs_size = self._get_erase_layout()
         start = address
-        fend = address+length
+        end = address+length
         # sanity check
-        if (start > fend) or (fend > len(self)):
+        if (start > end) or (end > len(self)):
             raise SerialFlashValueError('Out of flash storage range')
-        if fend > border > start:
-            end = border
-        else:
-            end = fend
-        if start >= border:
-            size = rs_size
+        if start < border < end:
+            # the area crosses the border of the "parameter zone"
+            regions = ((start, border, ls_size), (border, end, rs_size))
+        elif start < border:
+            regions = ((start, end, ls_size),)
         else:
-            size = ls_size
-        while True:  # expect 1 (no border cross) or 2 loops (border cross)
-            # sanity check
+            regions = ((start, end, rs_size),)
+        for start, end, size in regions:
             if start & (size-1):
                 # start address should be aligned on a (sub)sector boundary
                 raise SerialFlashValueError('Start address not aligned on a '
                                             'sector boundary')
-            # sanity check
             if (((end-start)-1) & (size-1)) != (size-1):
                 # length should be a multiple of a (sub)sector
                 raise SerialFlashValueError('End address not aligned on a '
                                             'sector boundary')
-            # stop condition
-            if (start >= border) or (end >= fend):
-                break
-            start = end
-            end = fend
-            size = rs_size
 
+    def _get_erase_layout(self) -> Tuple[int, int, int]:
+        """Report the border of the "parameter zone", and the erase sizes
+           of the regions on the left and right of this border.
 
+           The configuration register is only read once: TBPARM is a one-time
+           programmable bit, which this driver never alters.
+        """
+        if self._erase_layout:
+            return self._erase_layout
+        config = self._spi.exchange(self.REQ_READ_CONFIG, 1)[0]
+        if config & S25FlFlashDevice.CR_TBPARM:
+            # "parameter zone" is defined in the high sectors
+            border = len(self)-2*self.get_size('sector')
+            ls_size = self.get_size('sector')
+            rs_size = self.get_size('subsector')
+        else:
+            # "parameter zone" is defined in the low sectors
+            border = 2*self.get_size('sector')
+            ls_size = self.get_size('subsector')
+            rs_size = self.get_size('sector')
+        self._erase_layout = (border, ls_size, rs_size)
+        return self._erase_layout
+
+
+@_register_flash_device
 class M25PxFlashDevice(_Gen25FlashDevice):
     """Numonix M25P/M25PX flash device implementation"""
 
@@ -865,6 +947,7 @@ class M25PxFlashDevice(_Gen25FlashDevice):
              pretty_size(self._size, lim_m=1 << 20))
 
 
+@_register_flash_device
 class W25xFlashDevice(_Gen25FlashDevice):
     """Winbond W25Q/W25X flash device implementation"""
 
@@ -899,14 +982,8 @@ class W25xFlashDevice(_Gen25FlashDevice):
             (self._device, len(self) >> 17,
              pretty_size(self._size, lim_m=1 << 20))
 
-    def _erase_chip(self, command: int, times: Tuple[float, float]):
-        """Erase an entire chip"""
-        self._enable_write()
-        cmd = bytes((command,))
-        self._spi.exchange(cmd)
-        self._wait_for_completion(times)
-
 
+@_register_flash_device
 class Mx25lFlashDevice(_Gen25FlashDevice):
     """Macronix MX25L flash device implementation"""
 
@@ -956,6 +1033,7 @@ class Mx25lFlashDevice(_Gen25FlashDevice):
         self._wait_for_completion(self.get_timings('page'))
 
 
+@_register_flash_device
 class En25qFlashDevice(_Gen25FlashDevice):
     """EON EN25Q flash device implementation"""
 
@@ -984,6 +1062,7 @@ class En25qFlashDevice(_Gen25FlashDevice):
              pretty_size(self._size, lim_m=1 << 20))
 
 
+@_register_flash_device
 class At25FlashDevice(_Gen25FlashDevice):
     """Atmel AT25 flash device implementation"""
 
@@ -1023,13 +1102,6 @@ class At25FlashDevice(_Gen25FlashDevice):
             (self._device, len(self) >> 17,
              pretty_size(self._size, lim_m=1 << 20))
 
-    def _erase_chip(self, command: int, times: Tuple[float, float]):
-        """Erase an entire chip"""
-        self._enable_write()
-        cmd = bytes((command,))
-        self._spi.exchange(cmd)
-        self._wait_for_completion(times)
-
     @classmethod
     def match(cls, jedec):
         """Tells whether this class support this JEDEC identifier"""
@@ -1045,30 +1117,29 @@ class At25FlashDevice(_Gen25FlashDevice):
     def unlock(self):
         self._lock(self.CMD_UNPROTECT_SOFT_WRITE, 0, self._size)
 
-    def _erase_chip(self, command, times):
-        self._enable_write()
-        cmd = bytes((command,))
-        self._spi.exchange(cmd)
-        self._wait_for_completion(times)
+    def _erase_chip(self, command: int, times: Tuple[float, float]) -> None:
+        super(At25FlashDevice, self)._erase_chip(command, times)
         time.sleep(times[1])
 
     def _lock(self, command, address, length):
         # caller should have check address & length alignment
         sector_size = self.get_size('sector')
-        sector_mask = ~(self.get_size('sector')-1)
+        sector_mask = ~(sector_size-1)
         start = address & sector_mask
         end = (address+length) & sector_mask
+        times = self.get_timings('page')
+        wcmd = bytearray((command, 0, 0, 0))
+        if self.CMD_PROTECT_LOCK_WRITE == command:
+            wcmd.append(self.ASSERT_LOCK_PROTECT)
         for addr in range(start, end, sector_size):
+            # WEL is cleared once each sector command completes
             self._enable_write()
-            wcmd = bytearray((command,
-                              (addr >> 16) & 0xff, (addr >> 8) & 0xff,
-                              addr & 0xff))
-            if self.CMD_PROTECT_LOCK_WRITE == command:
-                wcmd.append(self.ASSERT_LOCK_PROTECT)
+            wcmd[1:4] = addr.to_bytes(3, 'big')
             self._spi.exchange(wcmd)
-            self._wait_for_completion(self.get_timings('page'))
+            self._wait_for_completion(times)
 
 
+@_register_flash_device
 class AT25XE041BFlashDevice(_Gen25FlashDevice):
     """Atmel AT25 flash device implementation"""
 
@@ -1110,7 +1181,6 @@ class AT25XE041BFlashDevice(_Gen25FlashDevice):
         capacity = jedec[1]
         self._device = 'AT25XE041B'
         self._size = AT25XE041BFlashDevice.SIZES[capacity]
-        print(self._size)
 
     def __str__(self):
         return 'Adesto %s %s' % \
@@ -1131,30 +1201,28 @@ class AT25XE041BFlashDevice(_Gen25FlashDevice):
     def unlock(self):
         self._lock(self.CMD_UNPROTECT_SOFT_WRITE, 0, self._size)
 
-    def _erase_chip(self, command, times):
-        self._enable_write()
-        cmd = bytes((command,))
-        self._spi.exchange(cmd)
-        self._wait_for_completion(times)
+    def _erase_chip(self, command: int, times: Tuple[float, float]) -> None:
+        super(AT25XE041BFlashDevice, self)._erase_chip(command, times)
         time.sleep(times[1])
 
     def _lock(self, command, address, length):
         # caller should have check address & length alignment
         sector_size = self.get_size('sector')
-        sector_mask = ~(self.get_size('sector')-1)
+        sector_mask = ~(sector_size-1)
         start = address & sector_mask
         end = (address+length) & sector_mask
+        times = self.get_timings('page')
+        wcmd = bytearray((command, 0, 0, 0))
+        if self.CMD_PROTECT_LOCK_WRITE == command:
+            wcmd.append(self.ASSERT_LOCK_PROTECT)
         for addr in range(start, end, sector_size):
+            # WEL is cleared once each sector command completes
             self._enable_write()
-            wcmd = bytearray((command,
-                              (addr >> 16) & 0xff,
-                              (addr >> 8) & 0xff,
-                              addr & 0xff))
-            if self.CMD_PROTECT_LOCK_WRITE == command:
-                wcmd.append(self.ASSERT_LOCK_PROTECT)
+            wcmd[1:4] = addr.to_bytes(3, 'big')
             self._spi.exchange(wcmd)
-            self._wait_for_completion(self.get_timings('page'))
+            self._wait_for_completion(times)
 
+@_register_flash_device
 class At45FlashDevice(_SpiFlashDevice):
     """Flash device implementation for AT45 (Atmel/Adesto)
 
@@ -1232,6 +1300,7 @@ class At45FlashDevice(_SpiFlashDevice):
     SECTOR_PROTECT_ERASE = 0xCF
 
     CMD_READ_STATUS = 0xD7  # Read status register
+    REQ_READ_STATUS = bytes((CMD_READ_STATUS,))
     CMD_ERASE_PAGE = 0x81
     CMD_ERASE_SUBSECTOR = 0x50
     CMD_ERASE_SECTOR = 0x7C
@@ -1255,6 +1324,7 @@ class At45FlashDevice(_SpiFlashDevice):
         capacity = (code >> self.CAPACITY_SHIFT) & self.CAPACITY_MASK
         self._devidx = capacity-2
         assert 0 <= self._devidx < len(self.PAGE_DIV)
+        self._sizes = {}
         self._size = self.get_size('chip')
         self._device = 'AT45DB'
         self._spi.set_frequency(self.SPI_FREQS_MAX[self._devidx]*1E06)
@@ -1273,12 +1343,15 @@ class At45FlashDevice(_SpiFlashDevice):
             (self._device, pretty_size(self._size, lim_m=1 << 20))
 
     def get_size(self, kind):
-        try:
-            divs = getattr(self, '%s_DIV' % kind.upper())
-            return 1 << divs[self._devidx]
-        except AttributeError:
-            raise SerialFlashNotSupported('%s erase is not supported' %
-                                          kind.title())
+        size = self._sizes.get(kind)
+        if size is None:
+            try:
+                divs = getattr(self, '%s_DIV' % kind.upper())
+            except AttributeError:
+                raise SerialFlashNotSupported('%s erase is not supported' %
+                                              kind.title())
+            size = self._sizes[kind] = 1 << divs[self._devidx]
+        return size
 
     @classmethod
     def get_erase_command(cls, block):
@@ -1323,9 +1396,9 @@ class At45FlashDevice(_SpiFlashDevice):
 
     def _erase_blocks(self, command, times, start, end, size):
         """Erase one or more blocks"""
+        wcmd = bytearray((command, 0, 0, 0))
         while start < end:
-            wcmd = bytes((command, (start >> 16) & 0xff,
-                          (start >> 8) & 0xff, start & 0xff))
+            wcmd[1:] = start.to_bytes(3, 'big')
             self._spi.exchange(wcmd)
             self._wait_for_completion(times)
             # very special case for first sector which is split in two
@@ -1336,8 +1409,7 @@ class At45FlashDevice(_SpiFlashDevice):
             start += size
 
     def _read_status(self):
-        read_cmd = bytes((self.CMD_READ_STATUS,))
-        data = self._spi.exchange(read_cmd, 1)
+        data = self._spi.exchange(self.REQ_READ_STATUS, 1)
         if len(data) != 1:
             raise SerialFlashTimeout("Unable to retrieve flash status")
         return data[0]
@@ -1349,34 +1421,34 @@ class At45FlashDevice(_SpiFlashDevice):
     def write(self, address: int,
               data: Union[bytes, bytearray, Iterable[int]]) -> None:
         """Write a sequence of bytes, starting at the specified address."""
-        length = len(data)
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+        view = memoryview(data).cast('B')
+        length = len(view)
         if address+length > len(self):
             raise SerialFlashValueError('Cannot fit in flash area')
-        if not isinstance(data, (bytes, bytearray)):
-            data = bytes(data)
         pos = 0
         page_size = self.get_size('page')
+        times = self.get_timings('page')
+        exchange = self._spi.exchange
         while pos < length:
             boffset = (address+pos) & (page_size-1)
             poffset = (address+pos) & ~(page_size-1)
-            # first step: write data to the device RAM buffer
+            # first step: write data to the device RAM buffer, the bytes of
+            # the page which are not written are left erased (0xFF)
             count = min(length-pos, page_size-boffset)
-            buf = bytearray([0xFF]*boffset)
-            buf.extend(data[pos:pos+count])
-            pad = bytes([0xFF]*(page_size-count-boffset))
-            buf.extend(pad)
-            assert len(buf) == page_size
-            wcmd = bytearray((self.CMD_WRITE_BUFFER1, 0, 0, 0))
-            wcmd.extend(buf)
-            self._spi.exchange(wcmd)
-            self._wait_for_completion(self.get_timings('page'))
+            wcmd = bytearray(b'\xff') * (4+page_size)
+            wcmd[:4] = bytes((self.CMD_WRITE_BUFFER1, 0, 0, 0))
+            wcmd[4+boffset:4+boffset+count] = view[pos:pos+count]
+            # the SRAM buffer write does not make the device busy, there is
+            # no need to poll its status before committing the buffer
+            exchange(wcmd)
             # second step: commit device buffer into flash cells
-            wcmd = bytes((self.CMD_COMMIT_BUFFER1,
-                          (poffset >> 16) & 0xff, (poffset >> 8) & 0xff,
-                          poffset & 0xff))
-            self._spi.exchange(wcmd)
-            self._wait_for_completion(self.get_timings('page'))
-            pos += page_size
+            wcmd = bytes((self.CMD_COMMIT_BUFFER1,)) + \
+                poffset.to_bytes(3, 'big')
+            exchange(wcmd)
+            self._wait_for_completion(times)
+            pos += count
 
     def _fix_page_size(self):
         """Fix AT45 page size to 512 bytes, rather than the default 528 bytes
@@ -1393,6 +1465,7 @@ class At45FlashDevice(_SpiFlashDevice):
                       "binary page size mode")
 
 
+@_register_flash_device
 class N25QFlashDevice(_Gen25FlashDevice):
     """Micron N25Q flash device implementation"""
 
@@ -1423,13 +1496,14 @@ class N25QFlashDevice(_Gen25FlashDevice):
              pretty_size(self._size, lim_m=1 << 20))
 
     def unlock(self):
-        self._enable_write()
-        for sector in range(len(self) >> 16):
-            addr = sector << 16
-            wcmd = bytes((self.CMD_WRLR,
-                          (addr >> 16) & 0xff,
-                          (addr >> 8) & 0xff,
-                          (addr >> 0) & 0xff,
+        # each sector owns a lock register, which is updated w/ a WRLR
+        # command, itself preceded with a WREN command
+        wcmd = bytearray((self.CMD_WRLR, 0, 0, 0,
                           (0 << self.SECTOR_LOCK_DOWN) |
                           (0 << self.SECTOR_WRITE_LOCK)))
-        self._spi.exchange(wcmd)
+        exchange = self._spi.exchange
+        wren_cmd = self.REQ_WRITE_ENABLE
+        for addr in range(0, len(self), self.get_size('sector')):
+            wcmd[1:4] = addr.to_bytes(3, 'big')
+            exchange(wren_cmd)
+            exchange(wcmd)